@@ -5,8 +5,12 @@ import json
 import os
 import asyncio
 import tempfile
+import copy
+import re
+import time
+import shutil
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
@@ -32,6 +36,73 @@ TRIGGERS_GOOD_MORNING = {
     "早安"
 }
 
+# 运势锐评的静态提示词：不含任何占位符，作为系统提示词保持不变，便于 provider 端复用前缀缓存
+FORTUNE_SYSTEM_PROMPT = [
+    "请你锐评一下这个人今天的运势，并告诉 Ta 今天适合做什么事，不适合做什么事\n",
+    "在生成评价的过程中，严格按照下面的要求进行：\n",
+    "1.不能提起今天的幸运值数字，只能提起运势等级\n",
+    "2.评价内容必须符合给出的运势等级，不能过于夸张或贬低\n",
+    "3.如果在今天之内，这个人已经多次询问运势，请你在评价中提及这一点，并根据 Ta 的行为适当调整评价内容，允许表达不满，但需要注意分寸，不能让 Ta 感到被冒犯\n",
+    "4.生成的评价不需要过于正式，允许带有调侃和幽默风格，同时可以适当使用表情符号、颜文字等\n",
+    "5.你可以提及关于 Ta 今天可能过得怎么样，但一定要保证积极向上，即使 Ta 的运势不佳，也要给 Ta 一些鼓励和希望\n",
+    "6.评价中不允许包含AI助手/大模型等词语\n",
+    "请严格按照你的人格设定生成评价，回答需精炼简洁，尽量不超过70字\n"
+]
+
+# 运势锐评的用户信息后缀：每次调用只有这一小段会变化
+FORTUNE_USER_PROMPT = "今天是 {date}，有个名字叫 {user_name} 的人，Ta 今天的运势是 {luck_level}，幸运值是 {luck_value}\n"
+
+# 旧版默认的整段提示词，用于识别未被用户修改过的旧配置并迁移
+LEGACY_FORTUNE_PROMPT = FORTUNE_USER_PROMPT + "".join(FORTUNE_SYSTEM_PROMPT)
+
+# 默认配置
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "features": {
+        "enable_fake_message": True,
+        "enable_greetings": True,
+        "enable_fortune": True,
+        "enable_rank": True
+    },
+    "fortune": {
+        "max_per_day": 0,
+        "prompt_for_LLM": {
+            "max_per_day": 0,
+            "system_prompt": FORTUNE_SYSTEM_PROMPT,
+            "user_prompt": FORTUNE_USER_PROMPT,
+            # 仅为建议值：只有转发 max_tokens 的 provider 才会生效，
+            # AstrBot 内置 provider 会丢弃该参数，需在 provider 的 custom_extra_body 中设置
+            "max_tokens": 256
+        },
+        "custom_good_list": [
+            "摸鱼",
+            "喝茶",
+            "散步",
+            "聊天",
+            "听音乐"
+        ],
+        "custom_bad_list": [
+            "加班",
+            "写报告",
+            "开会",
+            "熬夜",
+            "赶项目"
+        ],    
+    },
+    "greetings": {
+        "good_morning": [
+            "哼，早上好呀，{user_name}。\n昨晚睡得还好吗？别、别误会，我才不是关心你，只是觉得你要是迟到会很丢脸而已。\n\n快去洗漱吃早饭，打起精神来。\n今天也要好好表现，听到了没有？"
+        ],
+        "good_night": [
+            "晚，晚安啦，{user_name}！\n别误会，我可不是担心你，只是……今天看你还算努力。\n早点睡，明天要是状态不好，可是会拖后腿的，知道吗？\n……还有，别熬夜想些乱七八糟的事。\n好好休息，才、才不准做噩梦呢……\n\n（小声）\n……晚安。要是做梦的话，也给我做个像样点的。"
+        ]
+    },
+    "custom_actions": {
+        "摸鱼": "摸鱼一时爽，一直摸鱼一直爽！",
+        "水群": "水群可以，但别忘了正事哦~",
+        "写 BUG": "今天的BUG写得怎么样了？"
+    }
+}
+
 # 插件信息注册
 @register(
     "astrbot_plugin_chat_banter", 
@@ -55,76 +126,71 @@ class ChatBanter(Star):
         self.rank_file = os.path.join(base_dir, "fortune_rank.json")
         # 初始化锁
         self.rank_lock = asyncio.Lock()
-        # 初始化配置文件
-        self.config = self.load_config()
+        # 预热完成前先使用默认配置，真正的加载放到 initialize 中进行
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        # 预热缓存
+        self._ready = asyncio.Event()                   # 预热完成标志
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._rank_today: Optional[Tuple[str, Dict[str, Any]]] = None  # 今日排行榜缓存 (日期, 数据)
+        self._morning_pattern: Optional[re.Pattern] = None
+        self._night_pattern: Optional[re.Pattern] = None
+        self.startup_time_ms: Optional[float] = None    # 预热耗时（毫秒）
+        self._max_tokens_warned = False                 # 是否已提示过 max_tokens 未生效
 
     async def initialize(self):
-        """可选择实现异步的插件初始化方法，当实例化该插件类之后会自动调用该方法。"""
-        pass
+        """异步初始化：在后台加载配置并预热缓存，不阻塞 AstrBot 启动。"""
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self):
+        """并行预热：配置快照、触发词匹配器、今日排行榜"""
+        start = time.perf_counter()
+        try:
+            # 正则编译开销很小，直接在当前线程完成
+            self._build_trigger_patterns()
+            today = datetime.date.today().isoformat()
+            results = await asyncio.gather(
+                asyncio.to_thread(self.load_config),
+                self._get_today_rank(today),
+                return_exceptions = True
+            )
+            names = ["加载配置", "载入排行榜"]
+            for name, res in zip(names, results):
+                if isinstance(res, Exception):
+                    logger.error(f"[error] 插件预热失败（{name}）: {res}")
+            config = results[0]
+            if isinstance(config, dict):
+                # 迁移后的保存放回事件循环中执行，避免 terminate 之后仍有线程在写配置
+                if self._migrate_legacy_prompt(config):
+                    self.save_config(config)
+                self.config = config
+            else:
+                logger.error("[error] 配置加载失败，继续使用默认配置。")
+            self.startup_time_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"[info] 插件预热完成，耗时 {self.startup_time_ms:.1f} ms")
+        except asyncio.CancelledError:
+            logger.info("[info] 插件预热已取消。")
+            raise
+        finally:
+            # 无论成功、失败还是取消，都不能让等待预热的调用方一直挂起
+            self._ready.set()
+
+    def _build_trigger_patterns(self):
+        """将问候触发词编译为正则，替代逐个关键字的子串匹配"""
+        def compile_triggers(triggers) -> re.Pattern:
+            return re.compile("|".join(re.escape(k) for k in triggers))
+
+        self._morning_pattern = compile_triggers(TRIGGERS_GOOD_MORNING)
+        self._night_pattern = compile_triggers(TRIGGERS_GOOD_NIGHT)
 
     def load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
-        DEFAULT_CONFIG: Dict[str, Any] = {
-            "features": {
-                "enable_fake_message": True,
-                "enable_greetings": True,
-                "enable_fortune": True,
-                "enable_rank": True
-            },
-            "fortune": {
-                "max_per_day": 0,
-                "prompt_for_LLM": {
-                    "max_per_day": 0,
-                    "prompt": [
-                        "今天是 {date}，有个名字叫 {user_name} 的人，Ta 今天的运势是 {luck_level}，幸运值是 {luck_value}\n",
-                        "请你锐评一下这个人今天的运势，并告诉 Ta 今天适合做什么事，不适合做什么事\n",
-                        "在生成评价的过程中，严格按照下面的要求进行：\n",
-                        "1.不能提起今天的幸运值数字，只能提起运势等级\n",
-                        "2.评价内容必须符合给出的运势等级，不能过于夸张或贬低\n",
-                        "3.如果在今天之内，这个人已经多次询问运势，请你在评价中提及这一点，并根据 Ta 的行为适当调整评价内容，允许表达不满，但需要注意分寸，不能让 Ta 感到被冒犯\n",
-                        "4.生成的评价不需要过于正式，允许带有调侃和幽默风格，同时可以适当使用表情符号、颜文字等\n",
-                        "5.你可以提及关于 Ta 今天可能过得怎么样，但一定要保证积极向上，即使 Ta 的运势不佳，也要给 Ta 一些鼓励和希望\n",
-                        "6.评价中不允许包含AI助手/大模型等词语\n",
-                        "请严格按照你的人格设定生成评价，回答需精炼简洁，尽量不超过70字\n"
-                    ]
-                },
-                "custom_good_list": [
-                    "摸鱼",
-                    "喝茶",
-                    "散步",
-                    "聊天",
-                    "听音乐"
-                ],
-                "custom_bad_list": [
-                    "加班",
-                    "写报告",
-                    "开会",
-                    "熬夜",
-                    "赶项目"
-                ],    
-            },
-            "greetings": {
-                "good_morning": [
-                    "哼，早上好呀，{user_name}。\n昨晚睡得还好吗？别、别误会，我才不是关心你，只是觉得你要是迟到会很丢脸而已。\n\n快去洗漱吃早饭，打起精神来。\n今天也要好好表现，听到了没有？"
-                ],
-                "good_night": [
-                    "晚，晚安啦，{user_name}！\n别误会，我可不是担心你，只是……今天看你还算努力。\n早点睡，明天要是状态不好，可是会拖后腿的，知道吗？\n……还有，别熬夜想些乱七八糟的事。\n好好休息，才、才不准做噩梦呢……\n\n（小声）\n……晚安。要是做梦的话，也给我做个像样点的。"
-                ]
-            },
-            "custom_actions": {
-                "摸鱼": "摸鱼一时爽，一直摸鱼一直爽！",
-                "水群": "水群可以，但别忘了正事哦~",
-                "写 BUG": "今天的BUG写得怎么样了？"
-            }
-        }
-        
         # 确保配置文件目录存在
         os.makedirs(os.path.dirname(self.config_file), exist_ok = True)
         if not os.path.exists(self.config_file):
             with open(self.config_file, "w", encoding = "utf-8") as f:
                 json.dump(DEFAULT_CONFIG, f, ensure_ascii = False, indent = 2)
                 logger.info("[info] 配置文件不存在，已创建默认配置文件。")
-            return DEFAULT_CONFIG.copy()
+            return copy.deepcopy(DEFAULT_CONFIG)
         # 加载用户配置文件
         try:
             with open(self.config_file, "r", encoding="utf-8") as f:
@@ -132,12 +198,24 @@ class ChatBanter(Star):
 
             logger.info("[info] 配置文件加载成功，正在校验结构。")
             # 递归合并默认配置和用户配置
-            merged_config = self._deep_merge(DEFAULT_CONFIG, user_config)
+            merged_config = self._deep_merge(copy.deepcopy(DEFAULT_CONFIG), user_config)
             return merged_config
 
         except Exception as e:
             logger.error(f"[error] 加载配置文件失败，使用默认配置: {e}")
-            return DEFAULT_CONFIG.copy()
+            return copy.deepcopy(DEFAULT_CONFIG)
+
+    def _migrate_legacy_prompt(self, config: Dict[str, Any]) -> bool:
+        """旧版配置中未修改过的整段 prompt 拆分为 system_prompt / user_prompt，返回是否发生迁移"""
+        pconf = config.get("fortune", {}).get("prompt_for_LLM")
+        if not isinstance(pconf, dict) or "prompt" not in pconf:
+            return False
+        # 用户自定义过的提示词保持原样，继续走兼容逻辑
+        if self._join_prompt(pconf["prompt"]) != LEGACY_FORTUNE_PROMPT:
+            return False
+        del pconf["prompt"]
+        logger.info("[info] 检测到旧版默认提示词，已迁移为 system_prompt / user_prompt。")
+        return True
 
     def save_config(self, new_config: Dict[str, Any]) -> bool:
         """保存配置文件"""
@@ -147,7 +225,6 @@ class ChatBanter(Star):
             
             # 备份旧配置
             if os.path.exists(self.config_file):
-                import shutil
                 backup_file = self.config_file + ".bak"
                 shutil.copy2(self.config_file, backup_file)
             
@@ -163,17 +240,35 @@ class ChatBanter(Star):
             logger.error(f"[error] 保存配置文件失败: {e}")
             return False
 
-    def get_fortune_prompt(self) -> str:
-        """获取用于生成运势评价的提示词模板"""
+    def get_fortune_prompt(self) -> Tuple[str, str]:
+        """获取用于生成运势评价的提示词，返回 (系统提示词, 用户信息模板)"""
         fortune = self.config.get("fortune", {})
         # 获取 prompt_for_LLM 配置
         pconf = fortune.get("prompt_for_LLM", {})
 
         if not isinstance(pconf, dict):
-            return ""
+            return "", ""
 
-        prompt = pconf.get("prompt", [])        # 获取 prompt 字段
-        # 将列表拼接为字符串
+        # 兼容旧版配置：整段 prompt 模板全部作为用户提示词发送
+        if "prompt" in pconf:
+            return "", self._join_prompt(pconf.get("prompt"))
+
+        system_prompt = self._join_prompt(pconf.get("system_prompt", []))
+        user_prompt = self._join_prompt(pconf.get("user_prompt", ""))
+        return system_prompt, user_prompt
+
+    def get_fortune_max_tokens(self) -> int:
+        """获取运势评价的最大输出 token 数，0 表示不限制"""
+        pconf = self.config.get("fortune", {}).get("prompt_for_LLM", {})
+        if not isinstance(pconf, dict):
+            return 0
+        try:
+            return max(int(pconf.get("max_tokens", 0)), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _join_prompt(self, prompt) -> str:
+        """将列表形式的提示词拼接为字符串"""
         if isinstance(prompt, list):
             return "".join(prompt)
         elif isinstance(prompt, str):
@@ -184,7 +279,7 @@ class ChatBanter(Star):
 
     async def get_config_data(self) -> Dict[str, Any]:
         """返回当前配置数据"""
-        return self.config.copy()
+        return copy.deepcopy(self.config)
 
     def _deep_merge(self, base: dict, patch: dict) -> dict:
         """
@@ -207,6 +302,8 @@ class ChatBanter(Star):
 
     async def update_config(self, new_config: Dict[str, Any]) -> bool:
         """更新配置"""
+        # 等待预热完成，避免新配置被后台加载的旧配置覆盖
+        await self._ready.wait()
         try:
             # 合并新旧配置，保留新配置中没有的旧配置
             merged_config = self._deep_merge(self.config, new_config)
@@ -302,7 +399,7 @@ class ChatBanter(Star):
             return
         
         # 判断触发关键字
-        if any(key in text for key in TRIGGERS_GOOD_MORNING):
+        if self._match_trigger(text, self._morning_pattern, TRIGGERS_GOOD_MORNING):
             greetings = self.config.get("greetings", {})
             responses = greetings.get("good_morning", [])
             if responses:
@@ -326,7 +423,7 @@ class ChatBanter(Star):
             )
             yield event.plain_result(result)                    # 发送一条纯文本消息
             return
-        elif any(key in text for key in TRIGGERS_GOOD_NIGHT):
+        elif self._match_trigger(text, self._night_pattern, TRIGGERS_GOOD_NIGHT):
             greetings = self.config.get("greetings", {})
             responses = greetings.get("good_night", [])
             if responses:
@@ -447,17 +544,17 @@ class ChatBanter(Star):
             
         # 获取日期
         today = datetime.date.today().isoformat()
-        # 读取排行数据
-        rank_data = self._load_rank()
+        # 读取今日排行数据（优先使用缓存）
+        today_rank = await self._get_today_rank(today)
 
         # 检查今日是否有数据
-        if today not in rank_data or not rank_data[today]:
+        if not today_rank:
             yield event.plain_result("📊 今日还没有人抽运势哦～")
             return
         
         # 按幸运值排序，取前十名
         sorted_users = sorted(
-            rank_data[today].values(),
+            today_rank.values(),
             key = lambda x: x["luck"],
             reverse = True
         )[:10]
@@ -492,7 +589,6 @@ class ChatBanter(Star):
                         return str(config[key])
         
         # 使用类名
-        import re
         class_name = type(provider).__name__
         # 去掉常见后缀
         class_name = re.sub(r'(Provider|Official|Client)$', '', class_name)
@@ -548,46 +644,92 @@ class ChatBanter(Star):
 
     async def _generate_fortune_evaluation(self, provider_id, date, user_name, luck_level, luck_value):
         """生成运势评价"""
-        template_prompt = self.get_fortune_prompt()
-        # 使用默认提示词模板（如果配置中没有提供）
-        if not template_prompt:
-            template_prompt = (
-                "今天是 {date}，有个名字叫 {user_name} 的人，Ta 今天的运势是 {luck_level}，幸运值是 {luck_value}\n"
-                "请你锐评一下这个人今天的运势，并告诉 Ta 今天适合做什么事，不适合做什么事\n"
-                "在生成评价的过程中，严格按照下面的要求进行：\n"
-                "1.不能提起今天的幸运值数字，只能提起运势等级\n"
-                "2.评价内容必须符合给出的运势等级，不能过于夸张或贬低\n"
-                "3.如果在今天之内，这个人已经多次询问运势，请你在评价中提及这一点，并根据 Ta 的行为适当调整评价内容，允许表达不满，但需要注意分寸，不能让 Ta 感到被冒犯\n"
-                "4.生成的评价不需要过于正式，允许带有调侃和幽默风格，同时可以适当使用表情符号、颜文字等\n"
-                "5.你可以提及关于 Ta 今天可能过得怎么样，但一定要保证积极向上，即使 Ta 的运势不佳，也要给 Ta 一些鼓励和希望\n"
-                "6.评价中不允许包含AI助手/大模型等词语\n"
-                "请严格按照你的人格设定生成评价，回答需精炼简洁，尽量不超过70字\n"
-            )
+        system_prompt, user_prompt = self.get_fortune_prompt()
+        # 使用默认提示词（如果配置中没有提供）
+        if not system_prompt and not user_prompt:
+            system_prompt = "".join(FORTUNE_SYSTEM_PROMPT)
+            user_prompt = FORTUNE_USER_PROMPT
         
-        prompt = template_prompt.format(
+        # 只有用户信息后缀会被格式化，系统提示词在各次调用间保持一致
+        prompt = user_prompt.format(
             date        = date,
             user_name   = user_name,
             luck_level  = luck_level,
             luck_value  = luck_value
         )
+
+        llm_kwargs: Dict[str, Any] = {
+            "chat_provider_id": provider_id,
+            "prompt": prompt,
+        }
+        if system_prompt:
+            llm_kwargs["system_prompt"] = system_prompt
+        max_tokens = self.get_fortune_max_tokens()
+        if max_tokens > 0:
+            llm_kwargs["max_tokens"] = max_tokens
         
         try:
-            fortune_result = await self.context.llm_generate(
-                chat_provider_id=provider_id,
-                prompt=prompt,
-            )
-            
-            if hasattr(fortune_result, 'completion_text'):
-                return fortune_result.completion_text
-            elif isinstance(fortune_result, str):
-                return fortune_result
-            else:
-                return "今天运势不错，但要保持乐观哦！"
-                
+            fortune_result = await self.context.llm_generate(**llm_kwargs)
         except Exception as e:
             logger.error(f"[error] 调用 LLM 失败: {e}")
             return "今天运势不错，但要保持乐观哦！"
 
+        # token 统计失败不应影响已经生成的评价
+        try:
+            usage = self._record_token_usage(provider_id, fortune_result)
+            self._check_max_tokens_applied(provider_id, max_tokens, usage)
+        except Exception as e:
+            logger.error(f"[error] 记录 token 用量失败: {e}")
+
+        if hasattr(fortune_result, 'completion_text'):
+            return fortune_result.completion_text
+        elif isinstance(fortune_result, str):
+            return fortune_result
+        else:
+            return "今天运势不错，但要保持乐观哦！"
+
+    def _extract_token_usage(self, result) -> Dict[str, int]:
+        """从 LLM 返回结果中提取 token 用量，取不到的字段记为 0"""
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        # AstrBot 的 TokenUsage
+        token_usage = getattr(result, 'usage', None)
+        if token_usage is not None and hasattr(token_usage, 'output'):
+            usage["prompt_tokens"] = getattr(token_usage, 'input', 0) or 0
+            usage["completion_tokens"] = getattr(token_usage, 'output', 0) or 0
+            usage["cached_tokens"] = getattr(token_usage, 'input_cached', 0) or 0
+            return usage
+        # OpenAI 兼容接口的原始返回
+        raw_usage = getattr(getattr(result, 'raw_completion', None), 'usage', None)
+        if raw_usage is not None:
+            usage["prompt_tokens"] = getattr(raw_usage, 'prompt_tokens', 0) or 0
+            usage["completion_tokens"] = getattr(raw_usage, 'completion_tokens', 0) or 0
+            details = getattr(raw_usage, 'prompt_tokens_details', None)
+            usage["cached_tokens"] = getattr(details, 'cached_tokens', 0) or 0
+        return usage
+
+    def _check_max_tokens_applied(self, provider_id: str, max_tokens: int, usage: Dict[str, int]):
+        """输出超过 max_tokens 说明 provider 丢弃了该参数，提示一次改用 provider 配置"""
+        if max_tokens <= 0 or self._max_tokens_warned:
+            return
+        if usage["completion_tokens"] > max_tokens:
+            self._max_tokens_warned = True
+            logger.warning(
+                f"[warn] provider={provider_id} 未应用 max_tokens={max_tokens}"
+                f"（实际输出 {usage['completion_tokens']} tokens），"
+                f"请在该 provider 的 custom_extra_body 中设置 max_tokens。"
+            )
+
+    def _record_token_usage(self, provider_id: str, result) -> Dict[str, int]:
+        """在日志中记录单次调用的 token 用量"""
+        usage = self._extract_token_usage(result)
+        logger.info(
+            f"[fortune_llm] provider={provider_id} | "
+            f"prompt_tokens={usage['prompt_tokens']} | "
+            f"cached_tokens={usage['cached_tokens']} | "
+            f"completion_tokens={usage['completion_tokens']}"
+        )
+        return usage
+
     async def _get_user_query_count(self, user_id: str, date: str) -> int:
         """获取用户当天的查询次数"""
         query_file = os.path.join(os.path.dirname(self.config_file), "query_count.json")
@@ -631,10 +773,27 @@ class ChatBanter(Star):
         else:
             return "凶"
     
+    # 问候触发词匹配：预热完成前退回到逐个关键字匹配
+    def _match_trigger(self, text: str, pattern: Optional[re.Pattern], triggers) -> bool:
+        if pattern is not None:
+            return pattern.search(text) is not None
+        return any(key in text for key in triggers)
+
+    # 获取今日排行数据：只缓存当天的数据，日期变化后重新从文件载入
+    async def _get_today_rank(self, today: str) -> Dict[str, Any]:
+        cached = self._rank_today
+        if cached is not None and cached[0] == today:
+            return cached[1]
+        async with self.rank_lock:
+            data = await asyncio.to_thread(self._load_rank_or_backup)
+            self._rank_today = (today, data.get(today, {}))
+            return self._rank_today[1]
+
     # 排行榜更新：添加锁机制，保证写操作满足原子性
     async def _update_rank(self, user_id, user_name, luck, today):
         async with self.rank_lock:
-            data = self._load_rank()
+            # 以文件为准读取全部历史，内存中只保留今日数据
+            data = await asyncio.to_thread(self._load_rank_or_backup)
 
             data.setdefault(today, {})
             data[today][user_id] = {
@@ -642,7 +801,18 @@ class ChatBanter(Star):
                 "luck": luck
             }
 
-            self._save_rank(data)
+            await asyncio.to_thread(self._save_rank, data)
+            self._rank_today = (today, data[today])
+
+    # 载入排行文件，文件损坏时先备份再从空排行榜开始，避免下次写入覆盖历史数据
+    def _load_rank_or_backup(self):
+        try:
+            return self._load_rank()
+        except ValueError as e:
+            backup_file = self.rank_file + ".bak"
+            shutil.copy2(self.rank_file, backup_file)
+            logger.error(f"[error] 排行榜文件损坏，已备份至 {backup_file}，将重新创建排行榜: {e}")
+            return {}
 
     # 载入排行文件（json）
     def _load_rank(self):
@@ -680,5 +850,15 @@ class ChatBanter(Star):
 
     # 插件销毁方法
     async def terminate(self):
-        """可选择实现异步的插件销毁方法，当插件被卸载/停用时会调用。"""
-        pass
\ No newline at end of file
+        """插件销毁：取消后台预热任务，并等待进行中的排行榜写入完成。"""
+        if self._warm_up_task and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+            try:
+                await self._warm_up_task
+            except asyncio.CancelledError:
+                pass
+            # 任务可能在开始执行前就被取消，这里同样放行等待方
+            self._ready.set()
+        # 排行榜写入都在 rank_lock 内完成，拿到锁即说明没有未落盘的数据
+        async with self.rank_lock:
+            pass
\ No newline at end of file